@@ -1,4 +1,5 @@
-﻿import pandas as pd
+﻿import numpy as np
+import pandas as pd
 import streamlit as st
 from datetime import date
 
@@ -77,10 +78,35 @@ STAFF_ATTENDANCE_TOTALS = "Staff_Attendance_Totals"
 PAYMENTS_SHEET = "Payments"
 BILLING_SHEET = "Billing"
 
+REQUIRED_SHEETS = (
+    META_SHEET,
+    PARTICIPANTS_SHEET,
+    PARTICIPANTS_ATTENDANCE_SHEET,
+    PARTICIPANTS_ATTENDANCE_SUMMARY,
+    PARTICIPANTS_BACKUP,
+    PARTICIPANTS_SUMMARY,
+    STAFF_DETAILS_SHEET,
+    STAFF_BACKUP_SHEET,
+    STAFF_SUMMARY_SHEET,
+    STAFF_ATTENDANCE_SHEET,
+    STAFF_ATTENDANCE_TOTALS,
+    PAYMENTS_SHEET,
+    BILLING_SHEET,
+)
+
+
+@st.cache_resource(show_spinner=False)
+def _service_bundle():
+    creds = get_credentials()
+    service = build_sheets_service(creds)
+    spreadsheet_id = st.secrets.get("spreadsheet_id", DEFAULT_SPREADSHEET_ID)
+    return service, spreadsheet_id
 
-@st.cache_data(show_spinner=False, ttl=30)
-def read_df_cached(_service, spreadsheet_id: str, sheet: str) -> pd.DataFrame:
-    return read_sheet_as_df(_service, spreadsheet_id, sheet)
+
+@st.cache_data(show_spinner=False, ttl=300, max_entries=16)
+def read_df_cached(sheet: str) -> pd.DataFrame:
+    service, spreadsheet_id = _service_bundle()
+    return read_sheet_as_df(service, spreadsheet_id, sheet)
 
 
 def write_df(_service, spreadsheet_id: str, sheet: str, df: pd.DataFrame) -> None:
@@ -88,25 +114,47 @@ def write_df(_service, spreadsheet_id: str, sheet: str, df: pd.DataFrame) -> Non
     st.cache_data.clear()
 
 
+_DF_HASH_FUNCS = {pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).sum()}
+
+
+@st.cache_data(ttl=600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def summarize_staff_by_scholarship_cached(df: pd.DataFrame, scholarship_col: str, year_col: str) -> pd.DataFrame:
+    return summarize_staff_by_scholarship(df, scholarship_col=scholarship_col, year_col=year_col)
+
+
+@st.cache_data(ttl=600, max_entries=8, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def summarize_participant_attendance_yearly_cached(
+    attendance_df: pd.DataFrame, participants_df: pd.DataFrame, year: int
+) -> pd.DataFrame:
+    return summarize_participant_attendance_yearly(
+        attendance_df=attendance_df,
+        participants_df=participants_df,
+        year=year,
+        participants_serial_col="Serial Number",
+        participants_name_col="First Name",
+        participants_last_name_col="Last Name",
+        participants_attendance_col="Attendance",
+        attendance_serial_col="Serial Number",
+        attended_col="Attended",
+    )
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
 def ensure_required_sheets(_service, spreadsheet_id: str) -> None:
-    ensure_sheets(
-        _service,
-        spreadsheet_id,
-        [
-            META_SHEET,
-            PARTICIPANTS_SHEET,
-            PARTICIPANTS_ATTENDANCE_SHEET,
-            PARTICIPANTS_ATTENDANCE_SUMMARY,
-            PARTICIPANTS_BACKUP,
-            PARTICIPANTS_SUMMARY,
-            STAFF_DETAILS_SHEET,
-            STAFF_BACKUP_SHEET,
-            STAFF_SUMMARY_SHEET,
-            STAFF_ATTENDANCE_SHEET,
-            STAFF_ATTENDANCE_TOTALS,
-            PAYMENTS_SHEET,
-            BILLING_SHEET,
-        ],
+    ensure_sheets(_service, spreadsheet_id, list(REQUIRED_SHEETS))
+
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def participants_for_attendance(df: pd.DataFrame) -> pd.DataFrame:
+    return df.reindex(
+        columns=["Serial Number", "First Name", "Attendance Days", "Attendance"], fill_value=""
+    )
+
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def staff_for_attendance(df: pd.DataFrame) -> pd.DataFrame:
+    return df.reindex(
+        columns=["Serial Number", "First Name", "Last Name", "Scholarship", "Current Day"], fill_value=""
     )
 
 
@@ -114,32 +162,42 @@ def get_weekday_name(d: date) -> str:
     return d.strftime("%A")
 
 
+def fast_vconcat(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    dfs = [df for df in dfs if not df.empty]
+    if not dfs:
+        return pd.DataFrame()
+    if len(dfs) == 1:
+        return dfs[0].copy()
+    cols: list[str] = []
+    for df in dfs:
+        for c in df.columns:
+            if c not in cols:
+                cols.append(c)
+    aligned = [df.reindex(columns=cols, fill_value="") for df in dfs]
+    values = np.vstack([a.to_numpy(dtype=object) for a in aligned])
+    out = pd.DataFrame(values, columns=cols)
+    return out.where(pd.notnull(out), "").astype(str)
+
+
 def upsert_date_rows(base_df: pd.DataFrame, date_col: str, day_value: str, new_rows: pd.DataFrame) -> pd.DataFrame:
     if base_df.empty:
         return new_rows.copy()
-    out = base_df.copy()
-    if date_col in out.columns:
-        out = out[out[date_col].astype(str) != day_value]
-    out = pd.concat([out, new_rows], ignore_index=True)
-    return out
+    kept = base_df
+    if date_col in base_df.columns:
+        mask = base_df[date_col].to_numpy(dtype=object) != day_value
+        if mask.all():
+            kept = base_df
+        else:
+            kept = base_df[mask]
+    return pd.concat([kept, new_rows], ignore_index=True)
 
 
 def build_and_sync_participant_summary(_service, spreadsheet_id: str) -> pd.DataFrame:
-    participants_df = read_df_cached(_service, spreadsheet_id, PARTICIPANTS_SHEET)
-    attendance_df = read_df_cached(_service, spreadsheet_id, PARTICIPANTS_ATTENDANCE_SHEET)
+    participants_df = read_df_cached(PARTICIPANTS_SHEET)
+    attendance_df = read_df_cached(PARTICIPANTS_ATTENDANCE_SHEET)
     year = date.today().year
-    summary_df = summarize_participant_attendance_yearly(
-        attendance_df=attendance_df,
-        participants_df=participants_df,
-        year=year,
-        participants_serial_col="Serial Number",
-        participants_name_col="First Name",
-        participants_last_name_col="Last Name",
-        participants_attendance_col="Attendance",
-        attendance_serial_col="Serial Number",
-        attended_col="Attended",
-    )
-    existing_summary = read_df_cached(_service, spreadsheet_id, PARTICIPANTS_ATTENDANCE_SUMMARY)
+    summary_df = summarize_participant_attendance_yearly_cached(attendance_df, participants_df, year)
+    existing_summary = read_df_cached(PARTICIPANTS_ATTENDANCE_SUMMARY)
     left = summary_df.fillna("").astype(str)
     right = existing_summary.fillna("").astype(str) if not existing_summary.empty else pd.DataFrame()
     if left.to_dict("records") != right.to_dict("records"):
@@ -149,7 +207,6 @@ def build_and_sync_participant_summary(_service, spreadsheet_id: str) -> pd.Data
 
 with st.sidebar:
     st.title("Yated CRM")
-    spreadsheet_id = st.secrets.get("spreadsheet_id", DEFAULT_SPREADSHEET_ID)
     refresh = st.button("Refresh data")
     page = st.radio(
         "Section",
@@ -167,8 +224,7 @@ with st.sidebar:
     )
 
 try:
-    creds = get_credentials()
-    service = build_sheets_service(creds)
+    service, spreadsheet_id = _service_bundle()
     ensure_required_sheets(service, spreadsheet_id)
 except Exception as e:
     st.error(str(e))
@@ -206,7 +262,7 @@ if page == "Participants":
         "Special Notes",
     ]
 
-    df = read_df_cached(service, spreadsheet_id, PARTICIPANTS_SHEET)
+    df = read_df_cached(PARTICIPANTS_SHEET)
     if df.empty:
         df = pd.DataFrame(columns=cols)
 
@@ -413,8 +469,8 @@ if page == "Participant Attendance":
     attendance_date = st.date_input("Date", value=date.today())
     day_name = get_weekday_name(attendance_date)
 
-    participants = read_df_cached(service, spreadsheet_id, PARTICIPANTS_SHEET)
-    attendance_df = read_df_cached(service, spreadsheet_id, PARTICIPANTS_ATTENDANCE_SHEET)
+    participants = read_df_cached(PARTICIPANTS_SHEET)
+    attendance_df = read_df_cached(PARTICIPANTS_ATTENDANCE_SHEET)
 
     if not attendance_df.empty and "Date" in attendance_df.columns:
         existing = attendance_df[attendance_df["Date"].astype(str) == attendance_date.isoformat()]
@@ -426,7 +482,7 @@ if page == "Participant Attendance":
             st.info("No participants found.")
         else:
             base = build_participant_daily_attendance(
-                participants_df=participants,
+                participants_df=participants_for_attendance(participants),
                 attendance_days_col="Attendance Days",
                 attendance_flag_col="Attendance",
                 serial_col="Serial Number",
@@ -507,7 +563,7 @@ if page == "Staff Details":
         "Police Clearance",
     ]
 
-    staff_df = read_df_cached(service, spreadsheet_id, STAFF_DETAILS_SHEET)
+    staff_df = read_df_cached(STAFF_DETAILS_SHEET)
     if staff_df.empty:
         staff_df = pd.DataFrame(columns=staff_cols)
     for c in staff_cols:
@@ -515,7 +571,7 @@ if page == "Staff Details":
             staff_df[c] = ""
     staff_df = staff_df[staff_cols]
 
-    attendance_df = read_df_cached(service, spreadsheet_id, STAFF_ATTENDANCE_SHEET)
+    attendance_df = read_df_cached(STAFF_ATTENDANCE_SHEET)
     totals_map = compute_hourly_totals(attendance_df, serial_col="Serial Number", hours_col="Hours")
     staff_df = apply_hourly_totals(staff_df, "Serial Number", "Hourly Total", totals_map)
     staff_df = compute_remaining_hours(staff_df, "Annual Hours", "Hourly Total", "Remaining Hours")
@@ -655,7 +711,7 @@ if page == "Staff Details":
 
 if page == "Staff Backup":
     st.header("Staff Backup by Year")
-    backup_df = read_df_cached(service, spreadsheet_id, STAFF_BACKUP_SHEET)
+    backup_df = read_df_cached(STAFF_BACKUP_SHEET)
     if backup_df.empty:
         st.info("No backup data yet.")
     else:
@@ -668,8 +724,8 @@ if page == "Staff Attendance":
     attendance_date = st.date_input("Date", value=date.today())
     day_name = get_weekday_name(attendance_date)
 
-    staff_df = read_df_cached(service, spreadsheet_id, STAFF_DETAILS_SHEET)
-    attendance_df = read_df_cached(service, spreadsheet_id, STAFF_ATTENDANCE_SHEET)
+    staff_df = read_df_cached(STAFF_DETAILS_SHEET)
+    attendance_df = read_df_cached(STAFF_ATTENDANCE_SHEET)
 
     if not attendance_df.empty and "Date" in attendance_df.columns:
         existing = attendance_df[attendance_df["Date"].astype(str) == attendance_date.isoformat()]
@@ -681,7 +737,7 @@ if page == "Staff Attendance":
             st.info("No staff found.")
         else:
             base = build_staff_daily_attendance(
-                staff_df=staff_df,
+                staff_df=staff_for_attendance(staff_df),
                 current_day_col="Current Day",
                 serial_col="Serial Number",
                 first_name_col="First Name",
@@ -696,18 +752,20 @@ if page == "Staff Attendance":
 
     if not base.empty:
         expected_mask = base["Expected"].astype(str).str.lower() == "yes"
-        expected_names = (base.loc[expected_mask, "First Name"] + " " + base.loc[expected_mask, "Last Name"]).tolist()
+        full_names = (
+            base["First Name"].astype(str).str.strip() + " " + base["Last Name"].astype(str).str.strip()
+        ).str.strip()
+        expected_names = full_names[expected_mask].tolist()
         absent_list = st.multiselect(
             "Who did NOT attend today (from expected list)?",
             options=expected_names,
         )
         if st.button("Apply auto-mark staff"):
-            base["Attended"] = ""
-            for idx, row in base.iterrows():
-                name = f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip()
-                expected = str(row.get("Expected", "")).strip().lower() == "yes"
-                if expected:
-                    base.at[idx, "Attended"] = "No" if name in absent_list else "Yes"
+            base["Attended"] = np.where(
+                expected_mask,
+                np.where(full_names.isin(absent_list), "No", "Yes"),
+                "",
+            )
 
         edited = st.data_editor(
             base,
@@ -737,18 +795,14 @@ if page == "Staff Attendance":
 if page == "Payments":
     st.header("Parents' Payments")
 
-    participants = read_df_cached(service, spreadsheet_id, PARTICIPANTS_SHEET)
-    payments_df = read_df_cached(service, spreadsheet_id, PAYMENTS_SHEET)
+    participants = read_df_cached(PARTICIPANTS_SHEET)
+    payments_df = read_df_cached(PAYMENTS_SHEET)
 
     payment_number = 1
     if not payments_df.empty and "Payment Number" in payments_df.columns:
-        try:
-            nums = payments_df["Payment Number"].astype(str).str.strip()
-            nums_int = [int(n) for n in nums if n.isdigit()]
-            if nums_int:
-                payment_number = max(nums_int) + 1
-        except Exception:
-            pass
+        nums = pd.to_numeric(payments_df["Payment Number"].astype(str).str.strip(), errors="coerce")
+        if nums.notna().any():
+            payment_number = int(nums.max()) + 1
 
     with st.form("payment_form"):
         st.subheader("Add Payment")
@@ -790,8 +844,8 @@ if page == "Payments":
 if page == "Billing":
     st.header("Smart Monthly Billing")
 
-    participants = read_df_cached(service, spreadsheet_id, PARTICIPANTS_SHEET)
-    payments_df = read_df_cached(service, spreadsheet_id, PAYMENTS_SHEET)
+    participants = read_df_cached(PARTICIPANTS_SHEET)
+    payments_df = read_df_cached(PAYMENTS_SHEET)
 
     if participants.empty:
         st.info("No participants data.")
@@ -808,20 +862,24 @@ if page == "Billing":
             payment_month_col="Month",
         )
 
-        def _style_partial(val, row_idx, col):
-            if (row_idx, col) in billing.partial_mask:
-                return "background-color: #ffe699;"
-            return ""
-
-        styler = billing.df.style
-        for m in MONTHS_NOV_JUL:
-            if m in billing.df.columns:
-                styler = styler.apply(
-                    lambda r: [_style_partial(v, r.name, c) if c == m else "" for c, v in r.items()],
-                    axis=1,
-                )
+        st.dataframe(billing.df, width="stretch")
+
+        # Expander bodies still run on every rerun; a checkbox gate means
+        # the per-cell styling only executes when actually requested.
+        if st.checkbox("Show partial-payment highlights"):
+            month_index = {m: i for i, m in enumerate(MONTHS_NOV_JUL)}
 
-        st.dataframe(styler, width="stretch")
+            def _style_partial(row_idx, col):
+                if col in month_index and billing.partial_mask[row_idx, month_index[col]]:
+                    return "background-color: #ffe699;"
+                return ""
+
+            styler = billing.df.style.apply(
+                lambda r: [_style_partial(r.name, c) for c in r.index],
+                axis=1,
+            )
+
+            st.dataframe(styler, width="stretch")
         if st.button("Write Billing Table to Sheet"):
             write_df(service, spreadsheet_id, BILLING_SHEET, billing.df)
             st.success("Billing table updated.")
@@ -841,7 +899,7 @@ if page == "Admin":
         st.warning("Staff yearly rollover is due (on/after Sep 1).")
 
     if st.button("Run Staff Annual Rollover"):
-        staff_df = read_df_cached(service, spreadsheet_id, STAFF_DETAILS_SHEET)
+        staff_df = read_df_cached(STAFF_DETAILS_SHEET)
         if staff_df.empty:
             st.info("No staff data to rollover.")
         else:
@@ -853,33 +911,24 @@ if page == "Admin":
                 remove_cols=["Weekly Hours", "Annual Hours", "Remaining Hours", "Police Clearance", "Hourly Total"],
                 year_col="Year",
             )
-            backup_existing = read_df_cached(service, spreadsheet_id, STAFF_BACKUP_SHEET)
-            combined = (
-                pd.concat([backup_existing, backup_df], ignore_index=True)
-                if not backup_existing.empty
-                else backup_df
-            )
+            backup_existing = read_df_cached(STAFF_BACKUP_SHEET)
+            combined = fast_vconcat([backup_existing, backup_df])
             write_df(service, spreadsheet_id, STAFF_BACKUP_SHEET, combined)
             write_df(service, spreadsheet_id, STAFF_DETAILS_SHEET, pd.DataFrame(columns=staff_df.columns))
-            summary_df = summarize_staff_by_scholarship(combined, scholarship_col="Scholarship", year_col="Year")
+            summary_df = summarize_staff_by_scholarship_cached(combined, scholarship_col="Scholarship", year_col="Year")
             write_df(service, spreadsheet_id, STAFF_SUMMARY_SHEET, summary_df)
             set_meta(service, spreadsheet_id, {"last_staff_rollover_year": str(year)})
             st.success("Staff rollover completed.")
 
     if st.button("Archive Participants (Yearly Snapshot)"):
-        participants = read_df_cached(service, spreadsheet_id, PARTICIPANTS_SHEET)
+        participants = read_df_cached(PARTICIPANTS_SHEET)
         if participants.empty:
             st.info("No participants data.")
         else:
             year = date.today().year
-            participants_copy = participants.copy()
-            participants_copy["Year"] = str(year)
-            backup_existing = read_df_cached(service, spreadsheet_id, PARTICIPANTS_BACKUP)
-            combined = (
-                pd.concat([backup_existing, participants_copy], ignore_index=True)
-                if not backup_existing.empty
-                else participants_copy
-            )
+            participants_copy = participants.assign(Year=str(year))
+            backup_existing = read_df_cached(PARTICIPANTS_BACKUP)
+            combined = fast_vconcat([backup_existing, participants_copy])
             write_df(service, spreadsheet_id, PARTICIPANTS_BACKUP, combined)
             summary = (
                 combined.groupby("Year").size().reset_index(name="Participants")
@@ -24,6 +24,12 @@ class ParticipantRulesTests(unittest.TestCase):
         self.assertIn("Age", out.columns)
         self.assertEqual(out.loc[1, "Age"], "")
 
+    def test_compute_age_column_mixed_formats(self):
+        df = pd.DataFrame({"Date of Birth": ["13/02/2005", "March 5, 2001"]})
+        out = compute_age_column(df, "Date of Birth", "Age")
+        self.assertNotEqual(out.loc[0, "Age"], "")
+        self.assertNotEqual(out.loc[1, "Age"], "")
+
     def test_days_normalization_roundtrip(self):
         df = pd.DataFrame({"Attendance Days": ["Monday, Tuesday", "Wednesday"]})
         editor = normalize_days_for_editor(df, "Attendance Days")
@@ -29,9 +29,36 @@ class PaymentsTests(unittest.TestCase):
             payment_date_col="Payment Date",
             payment_month_col="Month",
         )
-        self.assertTrue(billing.partial_mask)
+        self.assertTrue(billing.partial_mask[0, 0])
         self.assertEqual(billing.df.loc[0, "November"], "80.0")
 
+    def test_billing_table_no_valid_payments(self):
+        participants = pd.DataFrame({
+            "Serial Number": ["1"],
+            "First Name": ["Nina"],
+            "Required Payment": ["160"],
+        })
+        payments = pd.DataFrame({
+            "Participant Serial": ["1"],
+            "Amount": ["80"],
+            "Payment Date": ["2026-08-01"],
+            "Month": ["August"],
+        })
+        billing = build_billing_table(
+            participants_df=participants,
+            payments_df=payments,
+            serial_col="Serial Number",
+            name_col="First Name",
+            required_col="Required Payment",
+            payment_serial_col="Participant Serial",
+            payment_amount_col="Amount",
+            payment_date_col="Payment Date",
+            payment_month_col="Month",
+        )
+        self.assertEqual(billing.df.loc[0, "November"], "")
+        self.assertEqual(billing.df.loc[0, "Total Paid"], "0.0")
+        self.assertFalse(billing.partial_mask.any())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -10,11 +10,13 @@ class SheetsIntegrationTests(unittest.TestCase):
     def test_read_sheet_as_df(self):
         service = mock.Mock()
         service.spreadsheets.return_value.values.return_value.get.return_value.execute.return_value = {
-            "values": [["A", "B"], ["1", "2"]]
+            "values": [["A", "B"], ["1", "2"], ["3"]]
         }
         df = sheets.read_sheet_as_df(service, "spreadsheet", "Sheet1")
         self.assertEqual(list(df.columns), ["A", "B"])
         self.assertEqual(df.loc[0, "A"], "1")
+        self.assertEqual(df.loc[1, "A"], "3")
+        self.assertEqual(df.loc[1, "B"], "")
 
     def test_ensure_sheet_exists_adds_missing(self):
         service = mock.Mock()
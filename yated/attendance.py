@@ -1,12 +1,16 @@
 ﻿from __future__ import annotations
 
-from datetime import date
 import calendar
+from datetime import date
 
+import numpy as np
 import pandas as pd
 
 from .constants import DAYS_ALLOWED
 
+_ATTENDED_TOKENS = frozenset({"yes", "true", "1", "✓"})
+_ACTIVE_TOKENS = frozenset({"✓", "true", "1", "yes", "y"})
+
 
 def build_participant_daily_attendance(
     participants_df: pd.DataFrame,
@@ -19,33 +23,30 @@ def build_participant_daily_attendance(
 ) -> pd.DataFrame:
     if participants_df.empty:
         return pd.DataFrame()
-    out_rows = []
-    for sid, name, days, flag in zip(
-        participants_df[serial_col].tolist(),
-        participants_df[name_col].tolist(),
-        participants_df[attendance_days_col].tolist(),
-        participants_df[attendance_flag_col].tolist(),
-    ):
-        expected = False
-        days_list = []
-        if isinstance(days, (list, tuple, set)):
-            days_list = [str(d).strip() for d in days]
-        else:
-            s = "" if days is None else str(days)
-            days_list = [p.strip() for p in s.split(",") if p.strip()]
-        expected = day_name in set(days_list) if day_name in DAYS_ALLOWED else False
-        active = str(flag).strip().upper() != "X"
-        expected = expected and active
-        out_rows.append(
-            {
-                "Date": attendance_date.isoformat(),
-                "Serial Number": str(sid).strip() if sid is not None else "",
-                "Participant Name": str(name).strip() if name is not None else "",
-                "Expected": "Yes" if expected else "No",
-                "Attended": "",
-            }
-        )
-    return pd.DataFrame(out_rows)
+
+    def _days_text(v: object) -> str:
+        if isinstance(v, (list, tuple, set)):
+            return ", ".join(str(d).strip() for d in v)
+        return "" if v is None else str(v)
+
+    days_text = participants_df[attendance_days_col].map(_days_text)
+    day_match = pd.Series(False, index=participants_df.index)
+    if day_name in DAYS_ALLOWED:
+        dummies = days_text.str.get_dummies(sep=",")
+        matching = [c for c in dummies.columns if c.strip() == day_name]
+        if matching:
+            day_match = dummies[matching].any(axis=1)
+    active = participants_df[attendance_flag_col].fillna("").astype(str).str.strip().str.upper().ne("X")
+    expected = (day_match & active).map({True: "Yes", False: "No"})
+    return pd.DataFrame(
+        {
+            "Date": attendance_date.isoformat(),
+            "Serial Number": participants_df[serial_col].fillna("").astype(str).str.strip(),
+            "Participant Name": participants_df[name_col].fillna("").astype(str).str.strip(),
+            "Expected": expected,
+            "Attended": "",
+        }
+    ).reset_index(drop=True)
 
 
 def build_staff_daily_attendance(
@@ -60,30 +61,26 @@ def build_staff_daily_attendance(
 ) -> pd.DataFrame:
     if staff_df.empty:
         return pd.DataFrame()
-    out_rows = []
-    for sid, fn, ln, sch, cur_day in zip(
-        staff_df[serial_col].tolist(),
-        staff_df[first_name_col].tolist(),
-        staff_df[last_name_col].tolist(),
-        staff_df[scholarship_col].tolist(),
-        staff_df[current_day_col].tolist(),
-    ):
-        expected = str(cur_day).strip() == day_name
-        out_rows.append(
-            {
-                "Date": attendance_date.isoformat(),
-                "Serial Number": str(sid).strip() if sid is not None else "",
-                "First Name": str(fn).strip() if fn is not None else "",
-                "Last Name": str(ln).strip() if ln is not None else "",
-                "Scholarship": str(sch).strip() if sch is not None else "",
-                "Expected": "Yes" if expected else "No",
-                "Attended": "",
-                "Transportation Done": "",
-                "Transportation Type": "",
-                "Hours": "",
-            }
-        )
-    return pd.DataFrame(out_rows)
+    cur = staff_df[current_day_col].fillna("").astype(str).str.strip().astype("category")
+    if day_name in cur.cat.categories:
+        expected_mask = cur.cat.codes.to_numpy() == cur.cat.categories.get_loc(day_name)
+    else:
+        expected_mask = np.zeros(len(staff_df), dtype=bool)
+    expected = np.where(expected_mask, "Yes", "No")
+    return pd.DataFrame(
+        {
+            "Date": attendance_date.isoformat(),
+            "Serial Number": staff_df[serial_col].fillna("").astype(str).str.strip(),
+            "First Name": staff_df[first_name_col].fillna("").astype(str).str.strip(),
+            "Last Name": staff_df[last_name_col].fillna("").astype(str).str.strip(),
+            "Scholarship": staff_df[scholarship_col].fillna("").astype(str).str.strip(),
+            "Expected": expected,
+            "Attended": "",
+            "Transportation Done": "",
+            "Transportation Type": "",
+            "Hours": "",
+        }
+    ).reset_index(drop=True)
 
 
 def summarize_participant_attendance(
@@ -92,40 +89,33 @@ def summarize_participant_attendance(
     name_col: str,
     attended_col: str,
 ) -> pd.DataFrame:
-    if attendance_df.empty:
-        return pd.DataFrame()
-    df = attendance_df.copy()
-    if "Date" not in df.columns:
+    if attendance_df.empty or "Date" not in attendance_df.columns:
         return pd.DataFrame()
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df[pd.notna(df["Date"])]
-    df["Month"] = df["Date"].dt.strftime("%Y-%m")
-    df["AttendedFlag"] = df[attended_col].map(lambda v: str(v).strip().lower() in {"yes", "true", "1", "✓"})
+    dates = pd.to_datetime(attendance_df["Date"], format="%Y-%m-%d", errors="coerce", cache=True)
+    attended = (
+        attendance_df[attended_col].fillna("").astype(str).str.strip().str.lower().isin(_ATTENDED_TOKENS)
+    )
+    keep = dates.notna() & attended
+    months = dates.dt.to_period("M").rename("Month")
     grouped = (
-        df[df["AttendedFlag"]]
-        .groupby([serial_col, name_col, "Month"])
+        months[keep]
+        .groupby([attendance_df.loc[keep, serial_col], attendance_df.loc[keep, name_col], months[keep]])
         .size()
         .reset_index(name="Attendances")
         .sort_values([serial_col, "Month"])
     )
+    grouped["Month"] = grouped["Month"].astype(str)
     return grouped
 
 
 def summarize_staff_hours(attendance_df: pd.DataFrame, serial_col: str, hours_col: str) -> pd.DataFrame:
     if attendance_df.empty:
         return pd.DataFrame()
-    out = attendance_df.copy()
-    totals = {}
-    for sid, hrs in zip(out[serial_col].tolist(), out[hours_col].tolist()):
-        key = "" if sid is None else str(sid).strip()
-        if not key:
-            continue
-        try:
-            h = float(str(hrs).strip())
-        except Exception:
-            h = 0.0
-        totals[key] = totals.get(key, 0.0) + h
-    return pd.DataFrame({"Serial Number": list(totals.keys()), "Total Hours": list(totals.values())})
+    sids = attendance_df[serial_col].fillna("").astype(str).str.strip()
+    hrs = pd.to_numeric(attendance_df[hours_col].astype(str).str.strip(), errors="coerce").fillna(0.0)
+    mask = sids.ne("")
+    totals = hrs[mask].groupby(sids[mask]).sum()
+    return totals.rename_axis("Serial Number").reset_index(name="Total Hours")
 
 
 def summarize_participant_attendance_yearly(
@@ -152,45 +142,54 @@ def summarize_participant_attendance_yearly(
     if participants_last_name_col not in p.columns:
         p[participants_last_name_col] = ""
 
-    def _is_active(v: object) -> bool:
-        if isinstance(v, bool):
-            return v
-        s = "" if v is None else str(v).strip().lower()
-        return s in {"✓", "true", "1", "yes", "y"}
-
-    active = p[p[participants_attendance_col].map(_is_active)].copy()
+    is_active = (
+        p[participants_attendance_col]
+        .fillna("")
+        .astype(str)
+        .str.strip()
+        .str.lower()
+        .isin(_ACTIVE_TOKENS)
+    )
+    active = p[is_active].copy()
     if active.empty:
         return pd.DataFrame(columns=base_cols)
 
-    counts: dict[tuple[str, int], int] = {}
+    pivot = None
     if not attendance_df.empty and "Date" in attendance_df.columns and attendance_serial_col in attendance_df.columns:
-        att = attendance_df.copy()
-        att["Date"] = pd.to_datetime(att["Date"], errors="coerce")
+        in_year = attendance_df["Date"].fillna("").astype(str).str.startswith(f"{year}-")
+        att = attendance_df.loc[in_year].copy()
+        att["Date"] = pd.to_datetime(att["Date"], format="%Y-%m-%d", errors="coerce", cache=True)
         att = att[pd.notna(att["Date"])]
-        att = att[att["Date"].dt.year == year]
-
-        def _attended(v: object) -> bool:
-            s = "" if v is None else str(v).strip().lower()
-            return s in {"yes", "true", "1", "✓"}
 
         if attended_col in att.columns:
-            att = att[att[attended_col].map(_attended)]
-            for sid, dt in zip(att[attendance_serial_col].tolist(), att["Date"].tolist()):
-                sid_key = "" if sid is None else str(sid).strip()
-                if not sid_key:
-                    continue
-                key = (sid_key, int(dt.month))
-                counts[key] = counts.get(key, 0) + 1
-
-    rows = []
-    for _, row in active.iterrows():
-        sid = "" if row.get(participants_serial_col) is None else str(row.get(participants_serial_col)).strip()
-        first = "" if row.get(participants_name_col) is None else str(row.get(participants_name_col)).strip()
-        last = "" if row.get(participants_last_name_col) is None else str(row.get(participants_last_name_col)).strip()
-        name = f"{first} {last}".strip()
-        row_out = {"Serial Number": sid, "Participant Name": name}
-        for m in range(1, date.today().month + 1):
-            row_out[calendar.month_name[m]] = str(counts.get((sid, m), 0))
-        rows.append(row_out)
-
-    return pd.DataFrame(rows, columns=base_cols)
+            attended = (
+                att[attended_col].fillna("").astype(str).str.strip().str.lower().isin(_ATTENDED_TOKENS)
+            )
+            att = att[attended]
+            sids = att[attendance_serial_col].fillna("").astype(str).str.strip()
+            months = att["Date"].dt.month
+            keep = sids.ne("")
+            pivot = months[keep].groupby([sids[keep], months[keep]]).size().unstack(fill_value=0)
+
+    active_sids = active[participants_serial_col].fillna("").astype(str).str.strip()
+    active_firsts = active[participants_name_col].fillna("").astype(str).str.strip()
+    active_lasts = active[participants_last_name_col].fillna("").astype(str).str.strip()
+
+    out = pd.DataFrame(
+        {
+            "Serial Number": active_sids.to_numpy(),
+            "Participant Name": (active_firsts + " " + active_lasts).str.strip().to_numpy(),
+        }
+    )
+    month_numbers = range(1, len(month_cols) + 1)
+    if pivot is None:
+        month_values = np.zeros((len(out), len(month_cols)), dtype=np.int64)
+    else:
+        month_values = (
+            pivot.reindex(index=active_sids, columns=month_numbers, fill_value=0)
+            .to_numpy(dtype=np.int64)
+        )
+    for label, col in zip(month_cols, month_values.T):
+        out[label] = col.astype(str)
+
+    return out[base_cols]
@@ -1,13 +1,18 @@
 ﻿from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 
 from .constants import DAYS_ALLOWED, DAYS_OPTIONS, PAYMENT_PER_DAY, MORNING_FRAMEWORK_ALERT
 
+_DAYS_ALLOWED_SET = frozenset(DAYS_ALLOWED)
+_DAYS_ORDER = {d: i for i, d in enumerate(DAYS_OPTIONS)}
+
 
 @dataclass
 class MediaConsentState:
@@ -15,50 +20,26 @@ class MediaConsentState:
     needs_attention: list[bool]
 
 
-def _parse_birthdate_to_date(v: object) -> date | None:
-    if v is None:
-        return None
-    s = str(v).strip()
-    if not s or s.lower() == "nan":
-        return None
-
-    dt = pd.to_datetime(s, errors="coerce", dayfirst=True)
-    if pd.notna(dt):
-        try:
-            return dt.date()
-        except Exception:
-            pass
-
-    try:
-        f = float(s)
-        dt2 = pd.to_datetime(f, unit="D", origin="1899-12-30", errors="coerce")
-        if pd.notna(dt2):
-            return dt2.date()
-    except Exception:
-        pass
+def _parse_birthdate_series(values: pd.Series) -> pd.Series:
+    s = values.fillna("").astype(str).str.strip()
+    s = s.mask(s.str.lower().eq("nan"), "")
+    iso = pd.to_datetime(s, format="ISO8601", errors="coerce")
+    dayfirst = pd.to_datetime(s.where(iso.isna()), format="mixed", errors="coerce", dayfirst=True)
+    serial = pd.to_datetime(
+        pd.to_numeric(s, errors="coerce"), unit="D", origin="1899-12-30", errors="coerce"
+    )
+    return iso.combine_first(dayfirst).combine_first(serial)
 
-    return None
 
-
-def _calculate_age_years(born: date, today: date) -> int:
-    years = today.year - born.year
-    if (today.month, today.day) < (born.month, born.day):
-        years -= 1
-    return max(0, years)
-
-
-def compute_age_column(df: pd.DataFrame, birthdate_col: str, age_col: str) -> pd.DataFrame:
+def compute_age_column(df: pd.DataFrame, birthdate_col: str, age_col: str, copy: bool = True) -> pd.DataFrame:
     if birthdate_col not in df.columns:
         return df
-    out = df.copy()
+    out = df.copy() if copy else df
     today = date.today()
-    ages: list[str] = []
-    for v in out[birthdate_col].tolist():
-        born = _parse_birthdate_to_date(v)
-        if born is None:
-            ages.append("")
-        else:
-            ages.append(str(_calculate_age_years(born, today)))
+    born = _parse_birthdate_series(out[birthdate_col])
+    before_birthday = (born.dt.month * 100 + born.dt.day) > (today.month * 100 + today.day)
+    years = (today.year - born.dt.year - before_birthday.astype("Int64")).clip(lower=0)
+    ages = years.astype("Int64").astype(str).where(born.notna(), "")
     if age_col in out.columns:
         out[age_col] = ages
     else:
@@ -66,70 +47,56 @@ def compute_age_column(df: pd.DataFrame, birthdate_col: str, age_col: str) -> pd
     return out
 
 
-def _shift_month(dt: date, months: int) -> date:
-    year = dt.year + (dt.month - 1 + months) // 12
-    month = (dt.month - 1 + months) % 12 + 1
-    day = min(dt.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28,
-                       31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1])
-    return date(year, month, day)
-
-
-def needs_morning_framework_alert(born: date | None, today: date | None = None) -> bool:
-    if born is None:
-        return False
-    today = today or date.today()
-    twenty_first = date(born.year + 21, born.month, born.day)
-    one_month_before = _shift_month(twenty_first, -1)
-    return today >= one_month_before
-
-
 def normalize_days_for_editor(df: pd.DataFrame, days_col: str) -> pd.DataFrame:
     if days_col not in df.columns:
         return df
     out = df.copy()
 
-    def _to_list(v: object) -> list[str]:
-        if v is None:
-            return []
-        if isinstance(v, list):
-            parts = [str(p).strip() for p in v]
-        else:
-            s = str(v).strip()
-            if not s or s.lower() == "nan":
-                return []
-            parts = [p.strip() for p in s.split(",")]
-        parts = [p for p in parts if p in DAYS_ALLOWED]
+    def _clean_list(v: Iterable[object]) -> list[str]:
         seen = set()
-        out_parts = []
-        for p in parts:
-            if p not in seen:
+        cleaned = []
+        for p in (str(p).strip() for p in v):
+            if p in _DAYS_ALLOWED_SET and p not in seen:
                 seen.add(p)
-                out_parts.append(p)
-        return out_parts
-
-    out[days_col] = out[days_col].map(_to_list)
+                cleaned.append(p)
+        return cleaned
+
+    is_list = out[days_col].map(lambda v: isinstance(v, (list, tuple, set)))
+    text = out.loc[~is_list, days_col].fillna("").astype(str).str.strip()
+    text = text.mask(text.str.lower().eq("nan"), "")
+    parts = text.str.split(",").explode().str.strip()
+    parts = parts[parts.isin(_DAYS_ALLOWED_SET)]
+    per_row = parts.reset_index().drop_duplicates().groupby("index")[days_col].agg(list)
+
+    out[days_col] = pd.Series(
+        [
+            _clean_list(v) if isinstance(v, (list, tuple, set)) else per_row.get(i, [])
+            for i, v in out[days_col].items()
+        ],
+        index=out.index,
+        dtype=object,
+    )
     return out
 
 
-def normalize_days_for_save(df: pd.DataFrame, days_col: str) -> pd.DataFrame:
+def _days_to_save_str(v: object) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, (list, tuple, set)):
+        parts = {str(p).strip() for p in v}
+        ordered = sorted(parts & _DAYS_ALLOWED_SET, key=_DAYS_ORDER.get)
+        return ", ".join(ordered)
+    s = str(v).strip()
+    if not s or s.lower() == "nan":
+        return ""
+    return s
+
+
+def normalize_days_for_save(df: pd.DataFrame, days_col: str, copy: bool = True) -> pd.DataFrame:
     if days_col not in df.columns:
         return df
-    out = df.copy()
-
-    def _to_str(v: object) -> str:
-        if v is None:
-            return ""
-        if isinstance(v, (list, tuple, set)):
-            parts = [str(p).strip() for p in v]
-            parts = [p for p in parts if p in DAYS_ALLOWED]
-            ordered = [d for d in DAYS_OPTIONS if d in set(parts)]
-            return ", ".join(ordered)
-        s = str(v).strip()
-        if not s or s.lower() == "nan":
-            return ""
-        return s
-
-    out[days_col] = out[days_col].map(_to_str)
+    out = df.copy() if copy else df
+    out[days_col] = out[days_col].map(_days_to_save_str)
     return out
 
 
@@ -139,21 +106,32 @@ def _count_allowed_days(text: object) -> int:
     if isinstance(text, (list, tuple, set)):
         parts = [str(p).strip() for p in text]
         parts = [p for p in parts if p]
-        return len({p for p in parts if p in DAYS_ALLOWED})
+        return len({p for p in parts if p in _DAYS_ALLOWED_SET})
 
     s = str(text).strip()
     if not s or s.lower() == "nan":
         return 0
     parts = [p.strip() for p in s.split(",")]
     parts = [p for p in parts if p]
-    return len({p for p in parts if p in DAYS_ALLOWED})
+    return len({p for p in parts if p in _DAYS_ALLOWED_SET})
 
 
-def compute_required_payment(df: pd.DataFrame, days_col: str, payment_col: str) -> pd.DataFrame:
+def compute_required_payment(df: pd.DataFrame, days_col: str, payment_col: str, copy: bool = True) -> pd.DataFrame:
     if days_col not in df.columns:
         return df
-    out = df.copy()
-    payments = [str(_count_allowed_days(v) * PAYMENT_PER_DAY) for v in out[days_col].tolist()]
+    out = df.copy() if copy else df
+
+    def _to_text(v: object) -> str:
+        if isinstance(v, (list, tuple, set)):
+            return ", ".join(str(p).strip() for p in v)
+        return "" if v is None else str(v)
+
+    text = out[days_col].map(_to_text).str.strip()
+    text = text.mask(text.str.lower().eq("nan"), "")
+    parts = text.str.split(",").explode().str.strip()
+    parts = parts[parts.isin(_DAYS_ALLOWED_SET)]
+    counts = parts.reset_index().drop_duplicates().groupby("index").size()
+    payments = (counts.reindex(out.index, fill_value=0) * PAYMENT_PER_DAY).astype(str)
     if payment_col in out.columns:
         out[payment_col] = payments
     else:
@@ -165,33 +143,21 @@ def normalize_media_consent_for_editor(
     df: pd.DataFrame, consent_col: str, year_col: str, current_year: int
 ) -> MediaConsentState:
     out = df.copy()
-    needs_attention: list[bool] = []
-
-    def _to_bool(v: object, y: object) -> bool:
-        s = "" if v is None else str(v).strip()
-        consented = s == "✓"
-        try:
-            y_int = int(str(y).strip())
-        except Exception:
-            y_int = None
-        current = consented and y_int == current_year
-        needs_attention.append(not current)
-        return current
-
     if consent_col not in out.columns:
-        return MediaConsentState(out, needs_attention)
+        return MediaConsentState(out, [])
 
-    years = out[year_col] if year_col in out.columns else [""] * len(out)
-    out[consent_col] = [
-        _to_bool(v, y) for v, y in zip(out[consent_col].tolist(), list(years))
-    ]
-    return MediaConsentState(out, needs_attention)
+    consented = out[consent_col].fillna("").astype(str).str.strip().eq("✓")
+    years = out[year_col] if year_col in out.columns else pd.Series("", index=out.index)
+    year_int = pd.to_numeric(years.astype(str).str.strip(), errors="coerce")
+    current = consented & year_int.eq(current_year)
+    out[consent_col] = current
+    return MediaConsentState(out, (~current).tolist())
 
 
 def normalize_media_consent_for_save(
-    df: pd.DataFrame, consent_col: str, year_col: str, current_year: int
+    df: pd.DataFrame, consent_col: str, year_col: str, current_year: int, copy: bool = True
 ) -> pd.DataFrame:
-    out = df.copy()
+    out = df.copy() if copy else df
     if consent_col not in out.columns:
         return out
 
@@ -219,67 +185,60 @@ def normalize_attendance_for_editor(df: pd.DataFrame, attendance_col: str) -> pd
     return out
 
 
-def normalize_attendance_for_save(df: pd.DataFrame, attendance_col: str) -> pd.DataFrame:
+def normalize_attendance_for_save(df: pd.DataFrame, attendance_col: str, copy: bool = True) -> pd.DataFrame:
     if attendance_col not in df.columns:
         return df
-    out = df.copy()
+    out = df.copy() if copy else df
     out[attendance_col] = out[attendance_col].map(lambda v: "✓" if bool(v) else "X")
     return out
 
 
-def move_absent_to_bottom(df: pd.DataFrame, attendance_col: str, name_cols: Iterable[str]) -> pd.DataFrame:
+def move_absent_to_bottom(
+    df: pd.DataFrame, attendance_col: str, name_cols: Iterable[str], copy: bool = True
+) -> pd.DataFrame:
     if attendance_col not in df.columns:
         return df
-    out = df.copy()
-    key = out[attendance_col].astype(str).map(lambda v: str(v).strip().upper())
-    out["_sort_absent"] = (key == "X").astype(int)
-    sort_cols = ["_sort_absent"] + [c for c in name_cols if c in out.columns]
-    out = out.sort_values(sort_cols, kind="mergesort")
-    out = out.drop(columns=["_sort_absent"])
+    out = df.copy() if copy else df
+    absent = out[attendance_col].astype(str).str.strip().str.upper().eq("X")
+    sort_cols = [c for c in name_cols if c in out.columns]
+    # The name sort always runs; the absent key is only built when some
+    # row actually carries an "X".
+    if absent.any():
+        out["_sort_absent"] = absent.to_numpy(dtype=np.int8)
+        sort_cols = ["_sort_absent"] + sort_cols
+    if sort_cols:
+        out = out.sort_values(sort_cols, kind="mergesort")
+        out = out.drop(columns=["_sort_absent"], errors="ignore")
     return out
 
 
-def _looks_int(s: str) -> bool:
-    s2 = s.strip()
-    if not s2:
-        return False
-    try:
-        int(s2)
-        return True
-    except Exception:
-        return False
-
-
-def autofill_serial_numbers(df: pd.DataFrame, id_col: str) -> pd.DataFrame:
+def autofill_serial_numbers(df: pd.DataFrame, id_col: str, copy: bool = True) -> pd.DataFrame:
     if id_col not in df.columns:
         return df
 
-    out = df.copy()
-    series = out[id_col].astype(str)
-    blank_mask = series.str.strip().eq("") | series.str.strip().str.lower().eq("nan")
-
-    existing_ints: list[int] = []
-    for v in series[~blank_mask].tolist():
-        if _looks_int(v):
-            existing_ints.append(int(v.strip()))
-
-    next_id = (max(existing_ints) + 1) if existing_ints else 1
-
-    for idx in out.index.tolist():
-        v = str(out.at[idx, id_col])
-        if v.strip() == "" or v.strip().lower() == "nan":
-            out.at[idx, id_col] = str(next_id)
-            next_id += 1
-
+    out = df.copy() if copy else df
+    s = out[id_col].fillna("").astype(str).str.strip()
+    blank = s.eq("") | s.str.lower().eq("nan")
+    nums = pd.to_numeric(s.where(~blank), errors="coerce")
+    next_id = int(nums.max()) + 1 if nums.notna().any() else 1
+    n_blank = int(blank.sum())
+    if n_blank:
+        out.loc[blank, id_col] = np.arange(next_id, next_id + n_blank).astype(str)
     return out
 
 
-def sanitize_df_for_sheet(df: pd.DataFrame) -> pd.DataFrame:
-    df2 = df.copy()
+def sanitize_df_for_sheet(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    df2 = df.copy() if copy else df
     df2.columns = [str(c).strip() for c in df2.columns]
-    df2 = df2.where(pd.notnull(df2), "")
-    for c in df2.columns:
-        df2[c] = df2[c].map(lambda v: "" if v is None else str(v))
+    for i in range(len(df2.columns)):
+        s = df2.iloc[:, i]
+        # Columns that already hold plain strings (the common case, since
+        # sheets arrive as strings) are left untouched.
+        if isinstance(s.dtype, pd.StringDtype) and not s.isna().any():
+            continue
+        if s.dtype == object and not s.isna().any() and s.map(type).eq(str).all():
+            continue
+        df2.isetitem(i, s.where(pd.notnull(s), "").astype(str))
     return df2
 
 
@@ -296,14 +255,55 @@ def apply_participant_rules(
     current_year: int,
     name_cols: Iterable[str],
 ) -> pd.DataFrame:
-    out = normalize_days_for_save(df, days_col=days_col)
-    out = normalize_attendance_for_save(out, attendance_col=attendance_col)
-    out = normalize_media_consent_for_save(out, consent_col, consent_year_col, current_year)
-    out = sanitize_df_for_sheet(out)
-    out = autofill_serial_numbers(out, id_col=id_col)
-    out = compute_age_column(out, birthdate_col=birthdate_col, age_col=age_col)
-    out = compute_required_payment(out, days_col=days_col, payment_col=payment_col)
-    out = move_absent_to_bottom(out, attendance_col=attendance_col, name_cols=name_cols)
+    out = df.copy()
+
+    # Days: one pass yields both the canonical save string and, from the
+    # same exploded intermediate, the allowed-day count for the payment.
+    def _days_updates() -> dict[str, object]:
+        if days_col not in out.columns:
+            return {}
+        days_text = out[days_col].map(_days_to_save_str)
+        parts = days_text.str.split(",").explode().str.strip()
+        parts = parts[parts.isin(_DAYS_ALLOWED_SET)]
+        counts = parts.reset_index().drop_duplicates().groupby("index").size()
+        payments = (counts.reindex(out.index, fill_value=0) * PAYMENT_PER_DAY).astype(str)
+        return {days_col: days_text, payment_col: payments}
+
+    def _attendance_updates() -> dict[str, object]:
+        if attendance_col not in out.columns:
+            return {}
+        return {attendance_col: out[attendance_col].map(lambda v: "✓" if bool(v) else "X")}
+
+    # Consent: the sheet mark and the consent year come from one boolean.
+    def _consent_updates() -> dict[str, object]:
+        if consent_col not in out.columns:
+            return {}
+        consented = out[consent_col].map(bool)
+        updates: dict[str, object] = {consent_col: np.where(consented, "✓", "")}
+        if consent_year_col in out.columns:
+            updates[consent_year_col] = np.where(consented, str(current_year), "")
+        return updates
+
+    # The three update groups touch disjoint columns and only read `out`,
+    # so they can run concurrently; ordering-sensitive steps come after.
+    updates = {}
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for future in [pool.submit(f) for f in (_days_updates, _attendance_updates, _consent_updates)]:
+            updates.update(future.result())
+    payment_values = updates.pop(payment_col, None)
+
+    for col, values in updates.items():
+        out[col] = values
+
+    out = sanitize_df_for_sheet(out, copy=False)
+    out = autofill_serial_numbers(out, id_col=id_col, copy=False)
+    out = compute_age_column(out, birthdate_col=birthdate_col, age_col=age_col, copy=False)
+    if payment_values is not None:
+        if payment_col in out.columns:
+            out[payment_col] = payment_values
+        else:
+            out.insert(len(out.columns), payment_col, payment_values)
+    out = move_absent_to_bottom(out, attendance_col=attendance_col, name_cols=name_cols, copy=False)
     return out
 
 
@@ -328,13 +328,10 @@ def build_morning_framework_alert_mask(
     }
     alert_framework_aliases.update({str(v).strip().casefold() for v in MORNING_FRAMEWORK_ALERT})
 
-    def _normalize_framework(v: object) -> str:
-        return "" if v is None else str(v).strip().casefold()
-
-    mask = []
-    for b, f in zip(df[birthdate_col].tolist(), df[framework_col].tolist()):
-        born = _parse_birthdate_to_date(b)
-        fw = _normalize_framework(f)
-        alert = fw in alert_framework_aliases and needs_morning_framework_alert(born, today)
-        mask.append(alert)
-    return mask
+    born = _parse_birthdate_series(df[birthdate_col])
+    threshold = born + pd.DateOffset(years=21) - pd.DateOffset(months=1)
+    date_alert = threshold.le(pd.Timestamp(today))
+    framework_alert = (
+        df[framework_col].fillna("").astype(str).str.strip().str.casefold().isin(alert_framework_aliases)
+    )
+    return (born.notna() & framework_alert & date_alert).tolist()
@@ -1,8 +1,8 @@
 ﻿from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
 from .constants import MONTHS_NOV_JUL
@@ -11,17 +11,7 @@ from .constants import MONTHS_NOV_JUL
 @dataclass
 class BillingTable:
     df: pd.DataFrame
-    partial_mask: dict[tuple[int, str], bool]
-
-
-def _month_name_from_date_str(s: str) -> str | None:
-    try:
-        dt = pd.to_datetime(s, errors="coerce")
-    except Exception:
-        dt = None
-    if dt is None or pd.isna(dt):
-        return None
-    return dt.strftime("%B")
+    partial_mask: np.ndarray
 
 
 def build_billing_table(
@@ -36,45 +26,55 @@ def build_billing_table(
     payment_month_col: str,
 ) -> BillingTable:
     if participants_df.empty:
-        return BillingTable(pd.DataFrame(), {})
+        return BillingTable(pd.DataFrame(), np.zeros((0, len(MONTHS_NOV_JUL)), dtype=bool))
 
     pay = payments_df.copy() if not payments_df.empty else pd.DataFrame()
     if not pay.empty and payment_month_col not in pay.columns:
-        pay[payment_month_col] = pay[payment_date_col].map(lambda v: _month_name_from_date_str(str(v)))
+        dates = pd.to_datetime(pay[payment_date_col].astype(str).str.strip(), errors="coerce")
+        pay[payment_month_col] = dates.dt.strftime("%B").fillna("")
 
-    rows = []
-    partial_mask: dict[tuple[int, str], bool] = {}
+    def _stripped(df: pd.DataFrame, col: str) -> pd.Series:
+        if col in df.columns:
+            return df[col].fillna("").astype(str).str.strip()
+        return pd.Series("", index=df.index)
 
-    for idx, row in participants_df.iterrows():
-        sid = str(row.get(serial_col, "")).strip()
-        name = str(row.get(name_col, "")).strip()
-        try:
-            required = float(str(row.get(required_col, "0")).strip())
-        except Exception:
-            required = 0.0
+    part_sids = _stripped(participants_df, serial_col)
+    names = _stripped(participants_df, name_col)
+    required = (
+        pd.to_numeric(_stripped(participants_df, required_col), errors="coerce").fillna(0.0).to_numpy()
+    )
 
-        month_values = {m: 0.0 for m in MONTHS_NOV_JUL}
-        if not pay.empty and sid:
-            p_rows = pay[pay[payment_serial_col].astype(str).str.strip() == sid]
-            for _, prow in p_rows.iterrows():
-                try:
-                    amt = float(str(prow.get(payment_amount_col, "0")).strip())
-                except Exception:
-                    amt = 0.0
-                month = str(prow.get(payment_month_col, "")).strip()
-                if month in month_values:
-                    month_values[month] += amt
+    if not pay.empty and payment_serial_col in pay.columns:
+        pay_sids = _stripped(pay, payment_serial_col)
+        amounts = pd.to_numeric(_stripped(pay, payment_amount_col), errors="coerce").fillna(0.0)
+        months = _stripped(pay, payment_month_col)
+        keep = pay_sids.ne("") & months.isin(MONTHS_NOV_JUL)
+        # Categorical months make the groupby integer-keyed; only in-season
+        # values are cast, since out-of-category entries are deprecated.
+        months_cat = pd.Series(
+            pd.Categorical(months[keep], categories=MONTHS_NOV_JUL),
+            index=months.index[keep],
+        )
+        month_values = (
+            amounts[keep]
+            .groupby([pay_sids[keep], months_cat], observed=False)
+            .sum()
+            .unstack(fill_value=0.0)
+            .reindex(index=part_sids, columns=MONTHS_NOV_JUL, fill_value=0.0)
+            .to_numpy(dtype=float)
+        )
+    else:
+        month_values = np.zeros((len(participants_df), len(MONTHS_NOV_JUL)))
 
-        row_out = {"Serial Number": sid, "Participant Name": name}
-        for m in MONTHS_NOV_JUL:
-            row_out[m] = str(round(month_values[m], 2)) if month_values[m] else ""
-            if required > 0 and 0 < month_values[m] < required:
-                partial_mask[(len(rows), m)] = True
-        total_paid = sum(month_values.values())
-        required_total = required * len(MONTHS_NOV_JUL)
-        row_out["Total Paid"] = str(round(total_paid, 2))
-        row_out["Balance"] = str(round(required_total - total_paid, 2))
-        rows.append(row_out)
+    required_col_vec = required[:, None]
+    partial_mask = (required_col_vec > 0) & (month_values > 0) & (month_values < required_col_vec)
 
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame({"Serial Number": part_sids.to_numpy(), "Participant Name": names.to_numpy()})
+    for m_idx, m in enumerate(MONTHS_NOV_JUL):
+        col = month_values[:, m_idx]
+        df[m] = pd.Series(np.round(col, 2)).astype(str).where(col != 0, "").to_numpy()
+    total_paid = month_values.sum(axis=1)
+    required_total = required * len(MONTHS_NOV_JUL)
+    df["Total Paid"] = pd.Series(np.round(total_paid, 2)).astype(str).to_numpy()
+    df["Balance"] = pd.Series(np.round(required_total - total_paid, 2)).astype(str).to_numpy()
     return BillingTable(df, partial_mask)
@@ -16,6 +16,7 @@ SCOPES = [
 ]
 
 
+@st.cache_resource(show_spinner=False)
 def get_credentials() -> Credentials:
     """
     Expects Streamlit Secrets in ONE of these formats:
@@ -58,8 +59,9 @@ def get_credentials() -> Credentials:
     )
 
 
-def build_sheets_service(creds: Credentials):
-    return build("sheets", "v4", credentials=creds, cache_discovery=False)
+@st.cache_resource(show_spinner=False)
+def build_sheets_service(_creds: Credentials):
+    return build("sheets", "v4", credentials=_creds, cache_discovery=False)
 
 
 def _normalize_headers(headers: list[str], width: int) -> list[str]:
@@ -83,7 +85,12 @@ def read_sheet_as_df(service, spreadsheet_id: str, worksheet_name: str) -> pd.Da
     values_resp = (
         service.spreadsheets()
         .values()
-        .get(spreadsheetId=spreadsheet_id, range=_a1_range_for_all(worksheet_name))
+        .get(
+            spreadsheetId=spreadsheet_id,
+            range=_a1_range_for_all(worksheet_name),
+            valueRenderOption="UNFORMATTED_VALUE",
+            dateTimeRenderOption="FORMATTED_STRING",
+        )
         .execute()
     )
     values = values_resp.get("values", [])
@@ -92,64 +99,74 @@ def read_sheet_as_df(service, spreadsheet_id: str, worksheet_name: str) -> pd.Da
 
     width = max(len(r) for r in values)
     headers = _normalize_headers(values[0], width)
-    rows = [r + [""] * (width - len(r)) for r in values[1:]]
-    return pd.DataFrame(rows, columns=headers)
+    # The API omits trailing empty cells, so rows come back ragged; the
+    # bare constructor pads them and reindex fixes the width.
+    return (
+        pd.DataFrame(values[1:])
+        .reindex(columns=range(width))
+        .set_axis(headers, axis=1)
+        .fillna("")
+    )
+
 
+_sheet_id_cache: dict[tuple[str, str], int] = {}
 
-def _col_num_to_a1(col_num_1_based: int) -> str:
-    if col_num_1_based <= 0:
-        raise ValueError("col_num_1_based must be >= 1")
-    s = ""
-    n = col_num_1_based
-    while n > 0:
-        n, r = divmod(n - 1, 26)
-        s = chr(65 + r) + s
-    return s
+
+def _get_sheet_id(service, spreadsheet_id: str, worksheet_name: str) -> int:
+    key = (spreadsheet_id, worksheet_name)
+    if key not in _sheet_id_cache:
+        meta = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        for s in meta.get("sheets", []):
+            props = s["properties"]
+            _sheet_id_cache[(spreadsheet_id, props["title"])] = props["sheetId"]
+    if key not in _sheet_id_cache:
+        raise RuntimeError(f"Worksheet '{worksheet_name}' not found in spreadsheet.")
+    return _sheet_id_cache[key]
 
 
 def write_df_to_sheet(service, spreadsheet_id: str, worksheet_name: str, df: pd.DataFrame) -> None:
+    sheet_id = _get_sheet_id(service, spreadsheet_id, worksheet_name)
     if df.empty:
-        values = [[]]
+        values = []
     else:
         values = [list(df.columns)] + df.values.tolist()
 
-    clear_end_col = _col_num_to_a1(max(26, len(df.columns) + 10))
-    clear_range = f"'{worksheet_name}'!A1:{clear_end_col}5000"
-    service.spreadsheets().values().clear(
-        spreadsheetId=spreadsheet_id, range=clear_range, body={}
-    ).execute()
-
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"'{worksheet_name}'!A1",
-        valueInputOption="USER_ENTERED",
-        body={"values": values},
+    # One batchUpdate: clear every cell value on the sheet, then write the
+    # new payload, instead of separate values.clear + values.update calls.
+    requests: list[dict[str, Any]] = [
+        {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}}
+    ]
+    if values:
+        requests.append(
+            {
+                "updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                    "rows": [
+                        {"values": [{"userEnteredValue": {"stringValue": str(v)}} for v in row]}
+                        for row in values
+                    ],
+                    "fields": "userEnteredValue",
+                }
+            }
+        )
+    service.spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet_id, body={"requests": requests}
     ).execute()
 
 
 def append_row(service, spreadsheet_id: str, worksheet_name: str, row_values: list[str]) -> None:
-    end_col = _col_num_to_a1(max(1, len(row_values)))
-    read_range = f"'{worksheet_name}'!A1:{end_col}"
-    existing = (
-        service.spreadsheets()
-        .values()
-        .get(spreadsheetId=spreadsheet_id, range=read_range)
-        .execute()
-    )
-    existing_values = existing.get("values", [])
-    next_row = len(existing_values) + 1
-
-    write_range = f"'{worksheet_name}'!A{next_row}:{end_col}{next_row}"
-    service.spreadsheets().values().update(
+    service.spreadsheets().values().append(
         spreadsheetId=spreadsheet_id,
-        range=write_range,
+        range=f"'{worksheet_name}'!A1",
         valueInputOption="USER_ENTERED",
+        insertDataOption="INSERT_ROWS",
         body={"values": [row_values]},
     ).execute()
 
 
-def list_worksheet_titles(service, spreadsheet_id: str) -> list[str]:
-    meta = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+@st.cache_data(ttl=60, show_spinner=False)
+def list_worksheet_titles(_service, spreadsheet_id: str) -> list[str]:
+    meta = _service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
     return [s["properties"]["title"] for s in meta.get("sheets", [])]
 
 
@@ -161,6 +178,7 @@ def ensure_sheet_exists(service, spreadsheet_id: str, worksheet_name: str) -> No
         spreadsheetId=spreadsheet_id,
         body={"requests": [{"addSheet": {"properties": {"title": worksheet_name}}}]},
     ).execute()
+    list_worksheet_titles.clear()
 
 
 def ensure_sheets(service, spreadsheet_id: str, worksheet_names: list[str]) -> None:
@@ -173,3 +191,4 @@ def ensure_sheets(service, spreadsheet_id: str, worksheet_names: list[str]) -> N
         service.spreadsheets().batchUpdate(
             spreadsheetId=spreadsheet_id, body={"requests": requests}
         ).execute()
+        list_worksheet_titles.clear()
@@ -13,6 +13,8 @@ TRANSPORTATION_OPTIONS = getattr(
     ["Ofakim", "Beer Sheva", "Haloch", "Hazor"],
 )
 
+_TRANSPORTATION_SET = frozenset(TRANSPORTATION_OPTIONS)
+
 
 @dataclass
 class PoliceClearanceState:
@@ -24,22 +26,18 @@ def normalize_police_clearance_for_editor(
     df: pd.DataFrame, gender_col: str, clearance_col: str
 ) -> PoliceClearanceState:
     out = df.copy()
-    needs_attention: list[bool] = []
-
     if clearance_col not in out.columns:
-        return PoliceClearanceState(out, needs_attention)
-
-    def _to_bool(g: object, v: object) -> bool:
-        gender = "" if g is None else str(g).strip().lower()
-        is_male = gender in {"male", "m"}
-        checked = bool(v) if isinstance(v, bool) else str(v).strip() == "✓"
-        needs_attention.append(is_male and not checked)
-        return checked
+        return PoliceClearanceState(out, [])
 
-    out[clearance_col] = [
-        _to_bool(g, v) for g, v in zip(out[gender_col].tolist(), out[clearance_col].tolist())
-    ]
-    return PoliceClearanceState(out, needs_attention)
+    vals = out[clearance_col]
+    if vals.dtype == bool:
+        checked = vals
+    else:
+        checked = vals.fillna("").astype(str).str.strip().eq("✓") | vals.eq(True)
+    gender = out[gender_col].fillna("").astype(str).str.strip().str.lower()
+    is_male = gender.isin({"male", "m"})
+    out[clearance_col] = checked.astype(bool)
+    return PoliceClearanceState(out, (is_male & ~checked).tolist())
 
 
 def normalize_police_clearance_for_save(df: pd.DataFrame, clearance_col: str) -> pd.DataFrame:
@@ -53,17 +51,13 @@ def normalize_police_clearance_for_save(df: pd.DataFrame, clearance_col: str) ->
 def compute_hourly_totals(attendance_df: pd.DataFrame, serial_col: str, hours_col: str) -> dict[str, float]:
     if attendance_df.empty or serial_col not in attendance_df.columns or hours_col not in attendance_df.columns:
         return {}
-    totals: dict[str, float] = {}
-    for sid, hrs in zip(attendance_df[serial_col].tolist(), attendance_df[hours_col].tolist()):
-        key = "" if sid is None else str(sid).strip()
-        if not key:
-            continue
-        try:
-            h = float(str(hrs).strip())
-        except Exception:
-            h = 0.0
-        totals[key] = totals.get(key, 0.0) + h
-    return totals
+    sids = attendance_df[serial_col].fillna("").astype(str).str.strip()
+    hrs = (
+        pd.to_numeric(attendance_df[hours_col].astype(str).str.strip(), errors="coerce")
+        .fillna(0.0)
+        .astype(float)
+    )
+    return hrs.groupby(sids).sum().drop("", errors="ignore").to_dict()
 
 
 def apply_hourly_totals(
@@ -75,14 +69,12 @@ def apply_hourly_totals(
     if staff_df.empty or serial_col not in staff_df.columns:
         return staff_df
     out = staff_df.copy()
-    totals_list = []
-    for sid in out[serial_col].tolist():
-        key = "" if sid is None else str(sid).strip()
-        totals_list.append(str(round(totals.get(key, 0.0), 2)) if key else "")
+    sids = out[serial_col].fillna("").astype(str).str.strip()
+    values = sids.map(totals).fillna(0.0).round(2).astype(str).where(sids.ne(""), "")
     if hourly_total_col in out.columns:
-        out[hourly_total_col] = totals_list
+        out[hourly_total_col] = values
     else:
-        out.insert(len(out.columns), hourly_total_col, totals_list)
+        out.insert(len(out.columns), hourly_total_col, values)
     return out
 
 
@@ -90,17 +82,9 @@ def compute_remaining_hours(df: pd.DataFrame, annual_col: str, total_col: str, r
     if annual_col not in df.columns or total_col not in df.columns:
         return df
     out = df.copy()
-    remaining: list[str] = []
-    for annual, total in zip(out[annual_col].tolist(), out[total_col].tolist()):
-        try:
-            a = float(str(annual).strip())
-        except Exception:
-            a = 0.0
-        try:
-            t = float(str(total).strip())
-        except Exception:
-            t = 0.0
-        remaining.append(str(round(a - t, 2)))
+    annual = pd.to_numeric(out[annual_col].astype(str).str.strip(), errors="coerce").fillna(0.0)
+    total = pd.to_numeric(out[total_col].astype(str).str.strip(), errors="coerce").fillna(0.0)
+    remaining = (annual - total).round(2).astype(str)
     if remaining_col in out.columns:
         out[remaining_col] = remaining
     else:
@@ -167,8 +151,7 @@ def derive_transportation_from_scholarship(scholarship: object, current_transpor
     if normalized in {"nakaz", "volunteer"}:
         return "X"
     current = "" if current_transportation is None else str(current_transportation).strip()
-    allowed = set(TRANSPORTATION_OPTIONS)
-    return current if current in allowed else ""
+    return current if current in _TRANSPORTATION_SET else ""
 
 
 def apply_staff_details_rules(